@@ -1,9 +1,9 @@
 # bot.py
 
-import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     MessageHandler,
@@ -13,9 +13,9 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode, ChatAction
 
-from config import BOT_TOKEN, ADMIN_IDS, TERABOX_DOMAINS
+from config import BOT_TOKEN, ADMIN_IDS, TERABOX_DOMAINS, TERABOX_DOMAINS_SORTED
 from extractors import extractor_manager
-from utils import proxy_manager, cache_manager, rate_limiter
+from utils import proxy_manager, cache_manager, rate_limiter, http_client
 
 # Logging setup
 logging.basicConfig(
@@ -70,6 +70,16 @@ HELP_MESSAGE = """
 • Video files marked with 🎬
 """
 
+DOMAINS_MESSAGE = (
+    "🌐 **Supported Domains**\n\n"
+    + "".join(f"• `{d}`\n" for d in TERABOX_DOMAINS_SORTED[:20])
+    + f"\n...and {len(TERABOX_DOMAINS) - 20} more!"
+)
+
+TOP_DOMAINS_MESSAGE = "🌐 **Top Domains:**\n\n" + "\n".join(
+    f"• `{d}`" for d in TERABOX_DOMAINS_SORTED[:15]
+)
+
 
 # ==================== HANDLERS ====================
 
@@ -97,14 +107,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def domains_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /domains command"""
-    domains_list = sorted(TERABOX_DOMAINS)[:20]
-    
-    text = "🌐 **Supported Domains**\n\n"
-    for domain in domains_list:
-        text += f"• `{domain}`\n"
-    text += f"\n...and {len(TERABOX_DOMAINS) - 20} more!"
-    
-    await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+    await update.message.reply_text(DOMAINS_MESSAGE, parse_mode=ParseMode.MARKDOWN)
 
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -133,6 +136,15 @@ async def process_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     url = message.text.strip()
     user_id = message.from_user.id
     
+    cache_key, cached = await extractor_manager.lookup(url)
+    # Cache hits skip upstream extraction but still count against the user
+    if cached and not rate_limiter.acquire_user(user_id):
+        await message.reply_text("⏳ Rate limit exceeded. Please wait.")
+        return
+    if cached and cached.get("files"):
+        await send_files(message, cached["files"])
+        return
+    
     await context.bot.send_chat_action(chat_id=message.chat_id, action=ChatAction.TYPING)
     
     processing_msg = await message.reply_text(
@@ -142,7 +154,7 @@ async def process_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     try:
-        result = await extractor_manager.extract(url, user_id)
+        result = cached or await extractor_manager.extract(url, user_id, cache_key)
         
         if not result.get("success"):
             error = result.get("error", "Unknown error")
@@ -161,11 +173,7 @@ async def process_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         await processing_msg.delete()
-        
-        for i, file_info in enumerate(files, 1):
-            await send_file_result(message, file_info, i, len(files))
-            if i < len(files):
-                await asyncio.sleep(0.5)
+        await send_files(message, files)
     
     except Exception as e:
         logger.error(f"Error processing link: {e}")
@@ -175,6 +183,20 @@ async def process_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+async def send_files(message, files: list):
+    """Send file results in order; AIORateLimiter absorbs flood limits"""
+    for i, file_info in enumerate(files, 1):
+        try:
+            await send_file_result(message, file_info, i, len(files))
+        except Exception as e:
+            logger.error(f"Error sending file result: {e}")
+
+
+def truncate(text: str, limit: int) -> str:
+    """Truncate text to limit characters, adding an ellipsis if cut"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
 async def send_file_result(message, file_info: dict, index: int, total: int):
     """Send formatted file result"""
     filename = file_info.get("filename", "Unknown")
@@ -186,14 +208,19 @@ async def send_file_result(message, file_info: dict, index: int, total: int):
     
     emoji = "🎬" if is_video else "📁"
     
-    text = f"{emoji} **File {index}/{total}**\n\n"
-    text += f"📄 **Name:** `{filename[:50]}{'...' if len(filename) > 50 else ''}`\n"
-    text += f"📦 **Size:** {size}\n"
+    lines = [
+        f"{emoji} **File {index}/{total}**",
+        "",
+        f"📄 **Name:** `{truncate(filename, 50)}`",
+        f"📦 **Size:** {size}",
+    ]
     
     if duration:
-        text += f"⏱ **Duration:** {duration}\n"
+        lines.append(f"⏱ **Duration:** {duration}")
     
-    text += f"\n✅ **Status:** Ready to download"
+    lines.append("")
+    lines.append("✅ **Status:** Ready to download")
+    text = "\n".join(lines)
     
     buttons = []
     if direct_link:
@@ -234,9 +261,7 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if data == "help":
         await query.message.reply_text(HELP_MESSAGE, parse_mode=ParseMode.MARKDOWN)
     elif data == "domains":
-        domains = sorted(TERABOX_DOMAINS)[:15]
-        text = "🌐 **Top Domains:**\n\n" + "\n".join([f"• `{d}`" for d in domains])
-        await query.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+        await query.message.reply_text(TOP_DOMAINS_MESSAGE, parse_mode=ParseMode.MARKDOWN)
     elif data == "stats":
         stats = cache_manager.memory_cache.get_stats()
         await query.message.reply_text(f"📊 Cache hit rate: {stats['hit_rate']}")
@@ -251,6 +276,7 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def post_init(application: Application):
     """Initialize after startup"""
+    await http_client.initialize()
     await proxy_manager.initialize()
     await cache_manager.initialize()
     
@@ -267,7 +293,9 @@ async def post_init(application: Application):
 
 async def shutdown(application: Application):
     """Cleanup on shutdown"""
-    await extractor_manager.close_all()
+    await cache_manager.close()
+    await proxy_manager.close()
+    await http_client.close()
     logger.info("Bot shut down cleanly")
 
 
@@ -276,6 +304,14 @@ def main():
     application = (
         Application.builder()
         .token(BOT_TOKEN)
+        .concurrent_updates(True)
+        .rate_limiter(AIORateLimiter(
+            overall_max_rate=28,
+            overall_time_period=1,
+            group_max_rate=18,
+            group_time_period=60,
+            max_retries=3,
+        ))
         .post_init(post_init)
         .post_shutdown(shutdown)
         .build()
@@ -1,7 +1,7 @@
 # config.py
 
 import os
-from typing import List, Dict
+from typing import List, Dict, FrozenSet, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,7 +17,7 @@ _admin_ids = os.getenv("ADMIN_IDS", "")
 ADMIN_IDS: List[int] = [int(x.strip()) for x in _admin_ids.split(",") if x.strip()]
 
 # ===================== ALL TERABOX DOMAINS =====================
-TERABOX_DOMAINS: List[str] = [
+TERABOX_DOMAINS: FrozenSet[str] = frozenset([
     # Main Domains
     "terabox.com",
     "teraboxapp.com",
@@ -72,7 +72,8 @@ TERABOX_DOMAINS: List[str] = [
     "xhosting.link",
     "filecloud.me",
     "boxcloud.me",
-]
+])
+TERABOX_DOMAINS_SORTED: Tuple[str, ...] = tuple(sorted(TERABOX_DOMAINS))
 
 # ===================== API ENDPOINTS =====================
 API_ENDPOINTS: List[Dict] = [
@@ -154,6 +155,10 @@ USER_RATE_LIMIT: int = int(os.getenv("USER_RATE_LIMIT", "10"))
 CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
 CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
 CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+# Expired results are still served for this long when every extractor fails
+CACHE_STALE_TTL: int = int(os.getenv("CACHE_STALE_TTL", "21600"))
+NEGATIVE_CACHE_TTL: int = int(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+INVALID_CACHE_TTL: int = int(os.getenv("INVALID_CACHE_TTL", "3600"))
 
 # ===================== DATABASE =====================
 REDIS_URL: str = os.getenv("REDIS_URL", "")
@@ -167,6 +172,8 @@ EXPONENTIAL_BACKOFF: bool = True
 REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
 CONNECT_TIMEOUT: int = int(os.getenv("CONNECT_TIMEOUT", "10"))
 READ_TIMEOUT: int = int(os.getenv("READ_TIMEOUT", "30"))
+# Delay between starting successive extractors when racing them
+EXTRACTOR_HEDGE_DELAY: float = float(os.getenv("EXTRACTOR_HEDGE_DELAY", "1.5"))
 
 # ===================== LOGGING =====================
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
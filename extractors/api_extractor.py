@@ -1,11 +1,33 @@
 # extractors/api_extractor.py
 
-from typing import Optional, Dict, Any
-from .base import BaseExtractor
+from typing import Optional, Dict, Any, List, Tuple
+from .base import BaseExtractor, first_success
+from utils.proxy_manager import proxy_manager
 from config import API_ENDPOINTS
-import logging
 
-logger = logging.getLogger(__name__)
+_SHORTURLINFO_PARAMS = {
+    "root": "1",
+    "app_id": "250528",
+    "web": "1",
+    "channel": "dubox",
+    "clienttype": "0"
+}
+
+_LIST_PARAMS = {
+    "root": "1",
+    "page": "1",
+    "num": "100"
+}
+
+# (shorturlinfo URL, list URL, headers) per configured endpoint
+_API_TARGETS: List[Tuple[Optional[str], Optional[str], Dict[str, str]]] = [
+    (
+        f"{c['base']}{c['endpoints']['shorturlinfo']}" if "shorturlinfo" in c["endpoints"] else None,
+        f"{c['base']}{c['endpoints']['list']}" if "list" in c["endpoints"] else None,
+        {"Referer": f"{c['base']}/", "Origin": c["base"]},
+    )
+    for c in API_ENDPOINTS
+]
 
 
 class APIExtractor(BaseExtractor):
@@ -13,6 +35,7 @@ class APIExtractor(BaseExtractor):
     
     name = "api"
     priority = 1
+    timeout = 8
     
     async def extract(self, url: str) -> Optional[Dict[str, Any]]:
         """Extract direct links using API"""
@@ -21,56 +44,34 @@ class APIExtractor(BaseExtractor):
             return {"error": "Invalid URL"}
         
         share_id = self.normalize_share_id(share_id)
+        proxy = await proxy_manager.get_proxy()
         
-        for api_config in API_ENDPOINTS:
-            try:
-                result = await self._try_api(api_config, share_id)
-                if result and result.get("success"):
-                    return result
-            except Exception as e:
-                logger.debug(f"API {api_config['name']} failed: {e}")
-                continue
-        
-        return None
+        return await first_success(
+            self._try_api(target, share_id, proxy) for target in _API_TARGETS
+        )
     
-    async def _try_api(self, api_config: Dict, share_id: str) -> Optional[Dict]:
+    async def _try_api(self, target: Tuple, share_id: str, proxy: Optional[str] = None) -> Optional[Dict]:
         """Try a specific API endpoint"""
-        base_url = api_config["base"]
-        endpoints = api_config["endpoints"]
+        shorturlinfo_url, list_url, headers = target
         
-        if "shorturlinfo" in endpoints:
-            result = await self._call_shorturlinfo(base_url, endpoints["shorturlinfo"], share_id)
+        if shorturlinfo_url:
+            result = await self._call_shorturlinfo(shorturlinfo_url, headers, share_id, proxy)
             if result:
                 return result
         
-        if "list" in endpoints:
-            result = await self._call_list(base_url, endpoints["list"], share_id)
+        if list_url:
+            result = await self._call_list(list_url, headers, share_id, proxy)
             if result:
                 return result
         
         return None
     
-    async def _call_shorturlinfo(self, base: str, endpoint: str, share_id: str) -> Optional[Dict]:
+    async def _call_shorturlinfo(
+        self, url: str, headers: Dict, share_id: str, proxy: Optional[str] = None
+    ) -> Optional[Dict]:
         """Call shorturlinfo API"""
-        url = f"{base}{endpoint}"
-        params = {
-            "shorturl": share_id,
-            "root": "1",
-            "app_id": "250528",
-            "web": "1",
-            "channel": "dubox",
-            "clienttype": "0"
-        }
-        
-        param_str = "&".join([f"{k}={v}" for k, v in params.items()])
-        full_url = f"{url}?{param_str}"
-        
-        headers = {
-            "Referer": f"{base}/",
-            "Origin": base
-        }
-        
-        response = await self.request(full_url, headers=headers)
+        params = {"shorturl": share_id, **_SHORTURLINFO_PARAMS}
+        response = await self.request(url, headers=headers, params=params, proxy=proxy)
         
         if response and isinstance(response, dict):
             if response.get("errno") == 0:
@@ -78,25 +79,12 @@ class APIExtractor(BaseExtractor):
         
         return None
     
-    async def _call_list(self, base: str, endpoint: str, share_id: str) -> Optional[Dict]:
+    async def _call_list(
+        self, url: str, headers: Dict, share_id: str, proxy: Optional[str] = None
+    ) -> Optional[Dict]:
         """Call share/list API"""
-        url = f"{base}{endpoint}"
-        params = {
-            "shorturl": share_id,
-            "root": "1",
-            "page": "1",
-            "num": "100"
-        }
-        
-        param_str = "&".join([f"{k}={v}" for k, v in params.items()])
-        full_url = f"{url}?{param_str}"
-        
-        headers = {
-            "Referer": f"{base}/",
-            "Origin": base
-        }
-        
-        response = await self.request(full_url, headers=headers)
+        params = {"shorturl": share_id, **_LIST_PARAMS}
+        response = await self.request(url, headers=headers, params=params, proxy=proxy)
         
         if response and isinstance(response, dict):
             if response.get("errno") == 0:
@@ -134,11 +122,21 @@ class APIExtractor(BaseExtractor):
         }
 
 
+def _domain_endpoints(domain: str) -> List[Tuple[str, Dict[str, str], Dict[str, str]]]:
+    """Build (URL, static params, headers) for each API on a domain"""
+    headers = {"Referer": f"{domain}/", "Origin": domain}
+    return [
+        (f"{domain}/api/shorturlinfo", {"root": "1"}, headers),
+        (f"{domain}/share/list", {"root": "1", "page": "1", "num": "100"}, headers),
+    ]
+
+
 class MultiDomainAPIExtractor(BaseExtractor):
     """Try multiple domains for the same API"""
     
     name = "multi_domain_api"
     priority = 2
+    timeout = 10
     
     DOMAINS = [
         "https://www.terabox.com",
@@ -151,6 +149,8 @@ class MultiDomainAPIExtractor(BaseExtractor):
         "https://www.momerybox.com",
     ]
     
+    ENDPOINTS = [_domain_endpoints(domain) for domain in DOMAINS]
+    
     async def extract(self, url: str) -> Optional[Dict[str, Any]]:
         """Try extracting from multiple domains"""
         share_id = self.extract_share_id(url)
@@ -158,32 +158,20 @@ class MultiDomainAPIExtractor(BaseExtractor):
             return None
         
         share_id = self.normalize_share_id(share_id)
+        proxy = await proxy_manager.get_proxy()
         
-        for domain in self.DOMAINS:
-            try:
-                result = await self._try_domain(domain, share_id)
-                if result and result.get("success"):
-                    return result
-            except Exception as e:
-                logger.debug(f"Domain {domain} failed: {e}")
-                continue
-        
-        return None
+        return await first_success(
+            self._try_domain(endpoints, share_id, proxy) for endpoints in self.ENDPOINTS
+        )
     
-    async def _try_domain(self, domain: str, share_id: str) -> Optional[Dict]:
+    async def _try_domain(
+        self, endpoints: List[Tuple], share_id: str, proxy: Optional[str] = None
+    ) -> Optional[Dict]:
         """Try a specific domain"""
-        endpoints = [
-            f"{domain}/api/shorturlinfo?shorturl={share_id}&root=1",
-            f"{domain}/share/list?shorturl={share_id}&root=1&page=1&num=100",
-        ]
-        
-        for endpoint in endpoints:
-            headers = {
-                "Referer": f"{domain}/",
-                "Origin": domain
-            }
-            
-            response = await self.request(endpoint, headers=headers)
+        for endpoint, params, headers in endpoints:
+            response = await self.request(
+                endpoint, headers=headers, params={"shorturl": share_id, **params}, proxy=proxy
+            )
             
             if response and isinstance(response, dict) and response.get("errno") == 0:
                 files = []
@@ -2,70 +2,77 @@
 
 import re
 import asyncio
-import aiohttp
+import functools
+import random
 import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
-from urllib.parse import urlparse
+from typing import Optional, Dict, Any, Iterable, Awaitable
 import logging
+import orjson
 
 from utils.user_agents import UserAgentManager
 from utils.proxy_manager import proxy_manager
 from utils.cookie_manager import cookie_manager
-from config import TERABOX_DOMAINS, MAX_RETRIES, RETRY_DELAY
+from utils.http_client import http_client
+from config import TERABOX_DOMAINS, TERABOX_DOMAINS_SORTED, MAX_RETRIES, RETRY_DELAY
 
 logger = logging.getLogger(__name__)
 
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/:?#]+)', re.IGNORECASE)
+_SHARE_RE = re.compile(r'(?:/s/1?|surl=1?|/sharing/link\?surl=1?)([a-zA-Z0-9_-]+)')
+_DOMAIN_SUFFIXES = tuple(f".{d}" for d in TERABOX_DOMAINS_SORTED)
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+_VIDEO_EXTS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp', '.ts')
+
+
+async def first_success(coros: Iterable[Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+    """Run coroutines concurrently and return the first successful result"""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    
+    try:
+        for future in asyncio.as_completed(tasks):
+            try:
+                result = await future
+            except Exception as e:
+                logger.debug("Concurrent attempt failed: %s", e)
+                continue
+            
+            if result and result.get("success"):
+                return result
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    
+    return None
+
 
 class BaseExtractor(ABC):
     """Base class for all extractors"""
     
     name: str = "base"
     priority: int = 0
-    
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-    
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30, connect=10)
-            connector = aiohttp.TCPConnector(ssl=False, limit=10)
-            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
-        return self.session
-    
-    async def close(self):
-        """Close session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    timeout: float = 15
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def is_valid_url(url: str) -> bool:
         """Check if URL is a valid Terabox URL"""
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower().replace("www.", "")
-            return any(domain.endswith(d) for d in TERABOX_DOMAINS)
+            domain = BaseExtractor.get_domain_from_url(url)
+            return domain in TERABOX_DOMAINS or domain.endswith(_DOMAIN_SUFFIXES)
         except:
             return False
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def extract_share_id(url: str) -> Optional[str]:
         """Extract share ID from URL"""
-        patterns = [
-            r'/s/1?([a-zA-Z0-9_-]+)',
-            r'surl=1?([a-zA-Z0-9_-]+)',
-            r'/sharing/link\?surl=1?([a-zA-Z0-9_-]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = _SHARE_RE.search(url)
+        return match.group(1) if match else None
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def normalize_share_id(share_id: str) -> str:
         """Normalize share ID"""
         if not share_id.startswith('1'):
@@ -73,25 +80,27 @@ class BaseExtractor(ABC):
         return share_id
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def get_domain_from_url(url: str) -> str:
         """Extract domain from URL"""
-        parsed = urlparse(url)
-        return parsed.netloc.lower().replace("www.", "")
+        match = _DOMAIN_RE.match(url)
+        return match.group(1).lower() if match else ""
     
     async def request(
         self,
         url: str,
         method: str = "GET",
         headers: Dict = None,
+        params: Dict = None,
         data: Dict = None,
         json_data: Dict = None,
         use_proxy: bool = True,
         use_cookie: bool = True,
-        retry: int = 0
+        proxy: Optional[str] = None
     ) -> Optional[Dict]:
         """Make HTTP request with retries"""
         
-        session = await self._get_session()
+        session = await http_client.get_session()
         
         request_headers = UserAgentManager.get_headers()
         if headers:
@@ -100,66 +109,62 @@ class BaseExtractor(ABC):
         if use_cookie:
             request_headers["Cookie"] = cookie_manager.get_cookie()
         
-        proxy = None
-        if use_proxy:
-            domain = self.get_domain_from_url(url)
-            proxy = await proxy_manager.get_proxy(domain)
-        
-        try:
-            start_time = time.time()
+        for attempt in range(MAX_RETRIES + 1):
+            # Reuse the caller's proxy until it fails, then pick one per attempt
+            current_proxy = None
+            if use_proxy:
+                current_proxy = proxy or await proxy_manager.get_proxy(self.get_domain_from_url(url))
             
-            async with session.request(
-                method,
-                url,
-                headers=request_headers,
-                data=data,
-                json=json_data,
-                proxy=proxy,
-            ) as response:
-                response_time = time.time() - start_time
+            try:
+                start_time = time.monotonic()
                 
-                if response.status == 200:
-                    if proxy:
-                        await proxy_manager.report_success(proxy, response_time)
-                    if use_cookie:
-                        cookie_manager.report_success(request_headers["Cookie"])
+                async with session.request(
+                    method,
+                    url,
+                    headers=request_headers,
+                    params=params,
+                    data=data,
+                    json=json_data,
+                    proxy=current_proxy,
+                ) as response:
+                    response_time = time.monotonic() - start_time
+                    
+                    if response.status == 200:
+                        if current_proxy:
+                            await proxy_manager.report_success(current_proxy, response_time)
+                        if use_cookie:
+                            cookie_manager.report_success(request_headers["Cookie"])
+                        
+                        content_type = response.headers.get("Content-Type", "")
+                        body = await response.read()
+                        
+                        if "application/json" in content_type:
+                            return orjson.loads(body)
+                        else:
+                            return {"html": body.decode(response.get_encoding(), errors="replace")}
                     
-                    content_type = response.headers.get("Content-Type", "")
+                    elif response.status == 429:
+                        logger.warning("Rate limited on %s", url)
                     
-                    if "application/json" in content_type:
-                        return await response.json()
                     else:
-                        return {"html": await response.text()}
-                
-                elif response.status == 429:
-                    logger.warning(f"Rate limited on {url}")
-                    if retry < MAX_RETRIES:
-                        await asyncio.sleep(RETRY_DELAY * (2 ** retry))
-                        return await self.request(
-                            url, method, headers, data, json_data,
-                            use_proxy, use_cookie, retry + 1
-                        )
-                
-                else:
-                    if proxy:
-                        await proxy_manager.report_failure(proxy)
-        
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout on {url}")
-            if proxy:
-                await proxy_manager.report_failure(proxy)
-        
-        except Exception as e:
-            logger.error(f"Request error: {e}")
-            if proxy:
-                await proxy_manager.report_failure(proxy)
-        
-        if retry < MAX_RETRIES:
-            await asyncio.sleep(RETRY_DELAY * (2 ** retry))
-            return await self.request(
-                url, method, headers, data, json_data,
-                use_proxy, use_cookie, retry + 1
-            )
+                        if current_proxy:
+                            await proxy_manager.report_failure(current_proxy)
+                            proxy = None
+            
+            except asyncio.TimeoutError:
+                logger.error("Timeout on %s", url)
+                if current_proxy:
+                    await proxy_manager.report_failure(current_proxy)
+                    proxy = None
+            
+            except Exception as e:
+                logger.error("Request error: %s", e)
+                if current_proxy:
+                    await proxy_manager.report_failure(current_proxy)
+                    proxy = None
+            
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(RETRY_DELAY * (2 ** attempt) + random.uniform(0, 0.25))
         
         return None
     
@@ -171,15 +176,14 @@ class BaseExtractor(ABC):
     @staticmethod
     def format_size(size_bytes: int) -> str:
         """Format size to human readable"""
-        if size_bytes == 0:
+        if not size_bytes:
+            return "Unknown"
+        try:
+            size_bytes = int(float(size_bytes))
+        except (TypeError, ValueError):
             return "Unknown"
-        units = ['B', 'KB', 'MB', 'GB', 'TB']
-        size = float(size_bytes)
-        unit_index = 0
-        while size >= 1024 and unit_index < len(units) - 1:
-            size /= 1024
-            unit_index += 1
-        return f"{size:.2f} {units[unit_index]}"
+        unit_index = min(max(size_bytes.bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (unit_index * 10)):.2f} {_SIZE_UNITS[unit_index]}"
     
     @staticmethod
     def format_duration(seconds: int) -> str:
@@ -196,5 +200,4 @@ class BaseExtractor(ABC):
     @staticmethod
     def is_video_file(filename: str) -> bool:
         """Check if file is a video"""
-        video_exts = ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp', '.ts']
-        return any(filename.lower().endswith(ext) for ext in video_exts)
+        return filename.lower().endswith(_VIDEO_EXTS)
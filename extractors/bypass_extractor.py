@@ -1,7 +1,7 @@
 # extractors/bypass_extractor.py
 
 import re
-import json
+import orjson
 import hashlib
 import time
 from typing import Optional, Dict, Any
@@ -10,15 +10,47 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_YUN_DATA_RE = re.compile(r'window\.yunData\s*=\s*({.+?});', re.DOTALL)
+
+_MOBILE_URL = "https://www.terabox.com/share/list"
+_MOBILE_PARAMS = {
+    "root": "1",
+    "page": "1",
+    "num": "100",
+    "clienttype": "1",
+    "channel": "android",
+}
+_MOBILE_HEADERS = {
+    "User-Agent": "terabox;4.5.0;Android;14;SM-S918B",
+}
+
+_APP_URL = "https://www.terabox.com/api/shorturlinfo"
+_APP_ID = "250528"
+_APP_ID_SUFFIX = f"&app_id={_APP_ID}".encode()
+# Every sign starts with the same bytes; copy this instead of re-hashing them
+_SIGN_PREFIX = hashlib.md5(b"shorturl=", usedforsecurity=False)
+
+_WAP_URL = "https://www.terabox.com/wap/share/filelist"
+_WAP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15",
+}
+
 
 class BypassExtractor(BaseExtractor):
     """Advanced bypass methods for difficult cases"""
     
     name = "bypass"
     priority = 5
+    timeout = 10
     
     async def extract(self, url: str) -> Optional[Dict[str, Any]]:
         """Try advanced bypass methods"""
+        share_id = self.extract_share_id(url)
+        if not share_id:
+            return None
+        
+        share_id = self.normalize_share_id(share_id)
+        
         methods = [
             self._mobile_api_bypass,
             self._app_api_bypass,
@@ -27,98 +59,59 @@ class BypassExtractor(BaseExtractor):
         
         for method in methods:
             try:
-                result = await method(url)
+                result = await method(url, share_id)
                 if result and result.get("success"):
                     return result
             except Exception as e:
-                logger.debug(f"Bypass method failed: {e}")
+                logger.debug("Bypass method failed: %s", e)
                 continue
         
         return None
     
-    async def _mobile_api_bypass(self, url: str) -> Optional[Dict]:
+    async def _mobile_api_bypass(self, url: str, share_id: str) -> Optional[Dict]:
         """Use mobile API endpoints"""
-        share_id = self.extract_share_id(url)
-        if not share_id:
-            return None
-        
-        share_id = self.normalize_share_id(share_id)
-        
-        mobile_url = f"https://www.terabox.com/share/list"
-        params = {
-            "shorturl": share_id,
-            "root": "1",
-            "page": "1",
-            "num": "100",
-            "clienttype": "1",
-            "channel": "android",
-        }
-        
-        param_str = "&".join([f"{k}={v}" for k, v in params.items()])
-        full_url = f"{mobile_url}?{param_str}"
-        
-        headers = {
-            "User-Agent": "terabox;4.5.0;Android;14;SM-S918B",
-        }
-        
-        response = await self.request(full_url, headers=headers)
+        params = {"shorturl": share_id, **_MOBILE_PARAMS}
+        response = await self.request(_MOBILE_URL, headers=_MOBILE_HEADERS, params=params)
         
         if response and isinstance(response, dict) and response.get("errno") == 0:
             return self._parse_api_response(response)
         
         return None
     
-    async def _app_api_bypass(self, url: str) -> Optional[Dict]:
+    async def _app_api_bypass(self, url: str, share_id: str) -> Optional[Dict]:
         """Use app-specific API"""
-        share_id = self.extract_share_id(url)
-        if not share_id:
-            return None
-        
-        share_id = self.normalize_share_id(share_id)
         timestamp = int(time.time() * 1000)
         
-        sign_str = f"shorturl={share_id}&timestamp={timestamp}&app_id=250528"
-        sign = hashlib.md5(sign_str.encode()).hexdigest()
+        sign_hash = _SIGN_PREFIX.copy()
+        sign_hash.update(share_id.encode())
+        sign_hash.update(b"&timestamp=")
+        sign_hash.update(str(timestamp).encode())
+        sign_hash.update(_APP_ID_SUFFIX)
         
-        app_url = f"https://www.terabox.com/api/shorturlinfo"
         params = {
             "shorturl": share_id,
             "timestamp": timestamp,
-            "sign": sign,
-            "app_id": "250528",
+            "sign": sign_hash.hexdigest(),
+            "app_id": _APP_ID,
             "clienttype": "5"
         }
         
-        param_str = "&".join([f"{k}={v}" for k, v in params.items()])
-        full_url = f"{app_url}?{param_str}"
-        
-        response = await self.request(full_url)
+        response = await self.request(_APP_URL, params=params)
         
         if response and isinstance(response, dict) and response.get("errno") == 0:
             return self._parse_api_response(response)
         
         return None
     
-    async def _wap_bypass(self, url: str) -> Optional[Dict]:
+    async def _wap_bypass(self, url: str, share_id: str) -> Optional[Dict]:
         """Use WAP version"""
-        share_id = self.extract_share_id(url)
-        if not share_id:
-            return None
-        
-        share_id = self.normalize_share_id(share_id)
-        wap_url = f"https://www.terabox.com/wap/share/filelist?surl={share_id}"
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15",
-        }
-        
-        response = await self.request(wap_url, headers=headers)
+        response = await self.request(_WAP_URL, headers=_WAP_HEADERS, params={"surl": share_id})
         
         if response and "html" in response:
-            match = re.search(r'window\.yunData\s*=\s*({.+?});', response["html"], re.DOTALL)
+            match = _YUN_DATA_RE.search(response["html"])
             if match:
                 try:
-                    data = json.loads(match.group(1))
+                    data = orjson.loads(match.group(1))
                     return self._parse_api_response(data)
                 except:
                     pass
@@ -127,21 +120,25 @@ class BypassExtractor(BaseExtractor):
     
     def _parse_api_response(self, data: Dict) -> Dict:
         """Parse API response"""
-        files = []
-        file_list = data.get("list", [])
-        
-        for item in file_list:
-            files.append({
-                "filename": item.get("server_filename", "Unknown"),
-                "size": item.get("size", 0),
-                "formatted_size": self.format_size(item.get("size", 0)),
-                "fs_id": str(item.get("fs_id", "")),
-                "direct_link": item.get("dlink", ""),
-                "is_video": item.get("category") == 1 or self.is_video_file(item.get("server_filename", "")),
-                "thumbnail": item.get("thumbs", {}).get("url3", ""),
-            })
+        files = [self._parse_file_item(item) for item in data.get("list", [])]
         
         if files:
             return {"success": True, "files": files, "extractor": self.name}
         
         return None
+    
+    def _parse_file_item(self, item: Dict) -> Dict:
+        """Parse a single file item"""
+        filename = item.get("server_filename", "Unknown")
+        size = item.get("size", 0)
+        thumbs = item.get("thumbs")
+        
+        return {
+            "filename": filename,
+            "size": size,
+            "formatted_size": self.format_size(size),
+            "fs_id": str(item.get("fs_id", "")),
+            "direct_link": item.get("dlink", ""),
+            "is_video": item.get("category") == 1 or self.is_video_file(filename),
+            "thumbnail": thumbs.get("url3", "") if thumbs else "",
+        }
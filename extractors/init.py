@@ -1,16 +1,18 @@
 # extractors/__init__.py
 
 import asyncio
-from typing import Optional, Dict, Any, List
+import hashlib
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
-from .base import BaseExtractor
+from .base import BaseExtractor, first_success
 from .api_extractor import APIExtractor, MultiDomainAPIExtractor
 from .scraper_extractor import ScraperExtractor
 from .third_party_extractor import ThirdPartyExtractor
 from .bypass_extractor import BypassExtractor
 from utils.cache_manager import cache_manager
 from utils.rate_limiter import rate_limiter
+from config import CACHE_TTL, CACHE_STALE_TTL, NEGATIVE_CACHE_TTL, INVALID_CACHE_TTL, EXTRACTOR_HEDGE_DELAY
 
 logger = logging.getLogger(__name__)
 
@@ -28,47 +30,118 @@ class ExtractorManager:
         ]
         self.extractors.sort(key=lambda e: e.priority)
     
-    async def extract(self, url: str, user_id: int = None) -> Dict[str, Any]:
-        """Extract direct links using all available methods"""
-        
+    @staticmethod
+    def cache_key(url: str) -> str:
+        """Build cache key so all URLs for one share hit the same entry"""
+        share_id = BaseExtractor.extract_share_id(url)
+        if share_id:
+            return f"extract:{BaseExtractor.normalize_share_id(share_id)}"
+        return f"extract:{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}"
+    
+    async def lookup(self, url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Validate the URL and check the cache, returning (cache key, cached result)"""
         if not BaseExtractor.is_valid_url(url):
-            return {"success": False, "error": "Invalid Terabox URL"}
-        
-        if not await rate_limiter.wait_and_acquire(user_id, timeout=10):
-            return {"success": False, "error": "Rate limit exceeded. Please wait."}
+            return None, None
         
-        cache_key = f"extract:{url}"
+        cache_key = self.cache_key(url)
         cached = await cache_manager.get(cache_key)
         if cached:
-            logger.info(f"Cache hit for {url}")
-            return cached
+            if cached.get("_neg"):
+                logger.info(f"Negative cache hit for {url}")
+            else:
+                logger.info(f"Cache hit for {url}")
+        return cache_key, cached
+    
+    async def extract(self, url: str, user_id: int = None, cache_key: str = None) -> Dict[str, Any]:
+        """Extract direct links using all available methods"""
+        # A cache key from lookup() means the URL is valid and the cache already missed
+        if cache_key is None:
+            cache_key, cached = await self.lookup(url)
+            if cache_key is None:
+                return {"success": False, "error": "Invalid Terabox URL"}
+            if cached:
+                return cached
         
-        last_error = None
-        for extractor in self.extractors:
-            try:
-                logger.info(f"Trying {extractor.name} extractor")
-                result = await extractor.extract(url)
-                
-                if result and result.get("success"):
-                    await cache_manager.set(cache_key, result, ttl=3600)
-                    logger.info(f"Success with {extractor.name}")
-                    return result
-                
-            except Exception as e:
-                logger.error(f"Extractor {extractor.name} error: {e}")
-                last_error = str(e)
-                continue
+        # Joining an extraction already in flight costs upstream nothing, so skip the limiter
+        if not cache_manager.in_flight(cache_key):
+            if not await rate_limiter.wait_and_acquire(user_id, timeout=10):
+                return {"success": False, "error": "Rate limit exceeded. Please wait."}
+            # Another update may have finished the same extraction while this one waited
+            cached = await cache_manager.get(cache_key)
+            if cached:
+                return cached
         
-        return {
+        return await cache_manager.single_flight(
+            cache_key, lambda: self._run_extractors(url, cache_key)
+        )
+    
+    async def _run_extractors(self, url: str, cache_key: str) -> Dict[str, Any]:
+        """Race the extractors in priority order and cache the outcome"""
+        errors: List[str] = []
+        finished = [asyncio.Event() for _ in self.extractors]
+        result = await first_success(
+            self._run_extractor(
+                extractor, url, finished[index - 1] if index else None, finished[index],
+                index * EXTRACTOR_HEDGE_DELAY, errors
+            )
+            for index, extractor in enumerate(self.extractors)
+        )
+        
+        if result:
+            await cache_manager.set(cache_key, result, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL)
+            return result
+        
+        stale = await cache_manager.get_stale(cache_key)
+        if stale and stale.get("success"):
+            logger.warning(f"All extractors failed for {url}, serving stale result")
+            return stale
+        
+        result = {
             "success": False,
-            "error": last_error or "Failed to extract download link"
+            "error": errors[-1] if errors else "Failed to extract download link",
+            "_neg": True
         }
+        # A link without a share ID will never resolve; anything else may be transient
+        if BaseExtractor.extract_share_id(url):
+            ttl = NEGATIVE_CACHE_TTL
+        else:
+            ttl = INVALID_CACHE_TTL
+        await cache_manager.set(cache_key, result, ttl=ttl)
+        return result
     
-    async def close_all(self):
-        """Close all extractor sessions"""
-        for extractor in self.extractors:
-            await extractor.close()
-
+    async def _run_extractor(
+        self,
+        extractor: BaseExtractor,
+        url: str,
+        previous_finished: Optional[asyncio.Event],
+        finished: asyncio.Event,
+        delay: float,
+        errors: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Start once the previous extractor finishes or the hedge delay passes"""
+        if previous_finished is not None:
+            try:
+                await asyncio.wait_for(previous_finished.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        
+        try:
+            logger.info(f"Trying {extractor.name} extractor")
+            result = await asyncio.wait_for(extractor.extract(url), timeout=extractor.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Extractor {extractor.name} timed out after {extractor.timeout}s")
+            errors.append(f"{extractor.name} timed out")
+            result = None
+        except Exception as e:
+            logger.error(f"Extractor {extractor.name} error: {e}")
+            errors.append(str(e))
+            result = None
+        
+        if result and result.get("success"):
+            logger.info(f"Success with {extractor.name}")
+        else:
+            finished.set()
+        return result
 
 # Global instance
 extractor_manager = ExtractorManager()
@@ -1,19 +1,68 @@
 # extractors/scraper_extractor.py
 
 import re
-import json
+import orjson
 from typing import Optional, Dict, Any
 from .base import BaseExtractor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Anchors stop just before the opening bracket; _slice_json finds the end
+_INITIAL_STATE_RE = re.compile(r'window\.__INITIAL_STATE__\s*=\s*(?=\{)')
+_LOCALS_MSET_RE = re.compile(r'locals\.mset\s*\(\s*(?=\{)')
+_FILE_LIST_RES = (
+    re.compile(r'"file_list"\s*:\s*(?=\[)'),
+    re.compile(r'"list"\s*:\s*(?=\[)'),
+)
+_JSON_TOKEN_RE = re.compile(r'[{}\[\]"\\]')
+_TRAILING_COMMA_OBJ_RE = re.compile(r',\s*}')
+_TRAILING_COMMA_ARR_RE = re.compile(r',\s*]')
+
+
+def _slice_json(text: str, start: int) -> Optional[str]:
+    """Return the balanced JSON object/array that opens at text[start]"""
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    
+    for match in _JSON_TOKEN_RE.finditer(text, start):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        
+        ch = match.group()
+        if in_string:
+            if ch == '\\':
+                escaped_pos = pos + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    
+    return None
+
+
+def _find_json(pattern: re.Pattern, html: str) -> Optional[str]:
+    """Find the JSON blob that follows an anchor pattern"""
+    match = pattern.search(html)
+    if not match:
+        return None
+    return _slice_json(html, match.end())
+
 
 class ScraperExtractor(BaseExtractor):
     """Extract by scraping the web page"""
     
     name = "scraper"
     priority = 3
+    timeout = 12
     
     async def extract(self, url: str) -> Optional[Dict[str, Any]]:
         """Extract direct links by scraping page"""
@@ -34,7 +83,7 @@ class ScraperExtractor(BaseExtractor):
                 if result and result.get("success"):
                     return result
             except Exception as e:
-                logger.debug(f"Scraping {try_url} failed: {e}")
+                logger.debug("Scraping %s failed: %s", try_url, e)
                 continue
         
         return None
@@ -61,26 +110,20 @@ class ScraperExtractor(BaseExtractor):
                     result["extractor"] = self.name
                     return result
             except Exception as e:
-                logger.debug(f"Extractor failed: {e}")
+                logger.debug("Extractor failed: %s", e)
                 continue
         
         return None
     
     def _extract_initial_state(self, html: str) -> Optional[Dict]:
         """Extract from window.__INITIAL_STATE__"""
-        patterns = [
-            r'window\.__INITIAL_STATE__\s*=\s*({.+?});?\s*</script>',
-            r'window\.__INITIAL_STATE__\s*=\s*({.+?})\s*;?\s*\n',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html, re.DOTALL)
-            if match:
-                try:
-                    data = json.loads(match.group(1))
-                    return self._parse_initial_state(data)
-                except:
-                    continue
+        json_str = _find_json(_INITIAL_STATE_RE, html)
+        if json_str:
+            try:
+                data = orjson.loads(json_str)
+                return self._parse_initial_state(data)
+            except:
+                pass
         
         return None
     
@@ -107,14 +150,13 @@ class ScraperExtractor(BaseExtractor):
     
     def _extract_locals_mset(self, html: str) -> Optional[Dict]:
         """Extract from locals.mset()"""
-        match = re.search(r'locals\.mset\s*\(\s*({.+?})\s*\)', html, re.DOTALL)
-        if match:
+        json_str = _find_json(_LOCALS_MSET_RE, html)
+        if json_str:
             try:
-                json_str = match.group(1)
-                json_str = re.sub(r',\s*}', '}', json_str)
-                json_str = re.sub(r',\s*]', ']', json_str)
+                json_str = _TRAILING_COMMA_OBJ_RE.sub('}', json_str)
+                json_str = _TRAILING_COMMA_ARR_RE.sub(']', json_str)
                 
-                data = json.loads(json_str)
+                data = orjson.loads(json_str)
                 file_list = data.get("file_list", {}).get("list", [])
                 
                 if file_list:
@@ -127,16 +169,11 @@ class ScraperExtractor(BaseExtractor):
     
     def _extract_file_list_json(self, html: str) -> Optional[Dict]:
         """Extract file_list JSON directly"""
-        patterns = [
-            r'"file_list"\s*:\s*(\[.+?\])\s*[,}]',
-            r'"list"\s*:\s*(\[.+?\])\s*[,}]',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html, re.DOTALL)
-            if match:
+        for pattern in _FILE_LIST_RES:
+            json_str = _find_json(pattern, html)
+            if json_str:
                 try:
-                    file_list = json.loads(match.group(1))
+                    file_list = orjson.loads(json_str)
                     files = [self._parse_file_item(item) for item in file_list]
                     if files:
                         return {"success": True, "files": files}
@@ -147,16 +184,18 @@ class ScraperExtractor(BaseExtractor):
     
     def _parse_file_item(self, item: Dict) -> Dict:
         """Parse a single file item"""
-        filename = item.get("server_filename", item.get("filename", "Unknown"))
+        filename = item.get("server_filename") or item.get("filename") or "Unknown"
+        size = item.get("size", 0)
+        thumbs = item.get("thumbs")
         
         return {
             "filename": filename,
-            "size": item.get("size", 0),
-            "formatted_size": self.format_size(item.get("size", 0)),
+            "size": size,
+            "formatted_size": self.format_size(size),
             "fs_id": str(item.get("fs_id", "")),
             "direct_link": item.get("dlink", ""),
             "is_video": item.get("category") == 1 or self.is_video_file(filename),
-            "thumbnail": item.get("thumbs", {}).get("url3", ""),
+            "thumbnail": thumbs.get("url3", "") if thumbs else "",
             "duration": self.format_duration(item.get("duration", 0)),
             "resolution": item.get("resolution", ""),
         }
@@ -13,6 +13,7 @@ class ThirdPartyExtractor(BaseExtractor):
     
     name = "third_party"
     priority = 4
+    timeout = 15
     
     async def extract(self, url: str) -> Optional[Dict[str, Any]]:
         """Try third-party extraction services"""
@@ -22,7 +23,7 @@ class ThirdPartyExtractor(BaseExtractor):
                 if result and result.get("success"):
                     return result
             except Exception as e:
-                logger.debug(f"Third party {api['name']} failed: {e}")
+                logger.debug("Third party %s failed: %s", api['name'], e)
                 continue
         
         return None
@@ -86,19 +87,23 @@ class ThirdPartyExtractor(BaseExtractor):
     
     def _extract_from_data(self, data: Dict) -> Optional[Dict]:
         """Extract files from data structure"""
-        files = []
-        file_list = data.get("files", data.get("list", []))
-        
-        for item in file_list:
-            files.append({
-                "filename": item.get("filename", item.get("name", "Unknown")),
-                "size": item.get("size", 0),
-                "formatted_size": self.format_size(item.get("size", 0)),
-                "direct_link": item.get("download_url", item.get("dlink", "")),
-                "is_video": self.is_video_file(item.get("filename", "")),
-            })
+        file_list = data.get("files") or data.get("list") or []
+        files = [self._parse_file_item(item) for item in file_list]
         
         if files:
             return {"success": True, "files": files, "extractor": self.name}
         
         return None
+    
+    def _parse_file_item(self, item: Dict) -> Dict:
+        """Parse a single file item"""
+        filename = item.get("filename") or item.get("name") or "Unknown"
+        size = item.get("size", 0)
+        
+        return {
+            "filename": filename,
+            "size": size,
+            "formatted_size": self.format_size(size),
+            "direct_link": item.get("download_url") or item.get("dlink", ""),
+            "is_video": self.is_video_file(filename),
+        }
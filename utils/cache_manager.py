@@ -11,17 +11,27 @@ from config import CACHE_ENABLED, CACHE_TTL, CACHE_MAX_SIZE, REDIS_URL
 
 logger = logging.getLogger(__name__)
 
+_SWEEP_INTERVAL = 60
+
+
+class _LeaderCancelled(Exception):
+    """The caller running a single_flight factory was cancelled"""
+
 
 @dataclass
 class CacheEntry:
     value: Any
-    created_at: float
-    ttl: int
+    expires_at: float
+    stale_until: float
     hits: int = 0
     
-    @property
-    def is_expired(self) -> bool:
-        return time.time() - self.created_at > self.ttl
+    # Deadlines are on the monotonic clock; callers read it once and pass it in
+    def is_expired(self, now: float) -> bool:
+        return now > self.expires_at
+    
+    def is_dead(self, now: float) -> bool:
+        """Past both the fresh and the stale window"""
+        return now > self.stale_until
 
 
 class MemoryCache:
@@ -33,43 +43,60 @@ class MemoryCache:
         self.default_ttl = default_ttl
         self.lock = asyncio.Lock()
         self.stats = {"hits": 0, "misses": 0}
+        
+        if not CACHE_ENABLED:
+            self.get = self.get_stale = self._disabled_get
+            self.set = self._disabled_set
+    
+    async def _disabled_get(self, key: str) -> Optional[Any]:
+        """Cache is disabled; always miss"""
+        return None
+    
+    async def _disabled_set(self, key: str, value: Any, ttl: int = None, stale_ttl: int = 0):
+        """Cache is disabled; drop the value"""
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if not CACHE_ENABLED:
+        # Reads never await, so they can't interleave with a locked writer
+        entry = self.cache.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
             return None
-            
-        async with self.lock:
-            if key in self.cache:
-                entry = self.cache[key]
-                
-                if entry.is_expired:
-                    del self.cache[key]
-                    self.stats["misses"] += 1
-                    return None
-                
-                self.cache.move_to_end(key)
-                entry.hits += 1
-                self.stats["hits"] += 1
-                return entry.value
-            
+        
+        now = time.monotonic()
+        if entry.is_expired(now):
+            if entry.is_dead(now):
+                del self.cache[key]
             self.stats["misses"] += 1
             return None
+        
+        self.cache.move_to_end(key)
+        entry.hits += 1
+        self.stats["hits"] += 1
+        return entry.value
     
-    async def set(self, key: str, value: Any, ttl: int = None):
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Get value even if expired, as long as it is within its stale window"""
+        entry = self.cache.get(key)
+        if entry is None or entry.is_dead(time.monotonic()):
+            return None
+        return entry.value
+    
+    async def set(self, key: str, value: Any, ttl: int = None, stale_ttl: int = 0):
         """Set value in cache"""
-        if not CACHE_ENABLED:
-            return
-            
         async with self.lock:
-            while len(self.cache) >= self.max_size:
+            if key not in self.cache and len(self.cache) >= self.max_size:
                 self.cache.popitem(last=False)
             
+            now = time.monotonic()
+            ttl = ttl or self.default_ttl
             self.cache[key] = CacheEntry(
                 value=value,
-                created_at=time.time(),
-                ttl=ttl or self.default_ttl
+                expires_at=now + ttl,
+                stale_until=now + max(ttl, stale_ttl)
             )
+            # A refreshed stale entry keeps its old slot; mark it most recent
+            self.cache.move_to_end(key)
     
     async def delete(self, key: str):
         """Delete from cache"""
@@ -77,6 +104,15 @@ class MemoryCache:
             if key in self.cache:
                 del self.cache[key]
     
+    async def purge_expired(self) -> int:
+        """Drop entries past their stale window, returning how many were removed"""
+        async with self.lock:
+            now = time.monotonic()
+            dead = [key for key, entry in self.cache.items() if entry.is_dead(now)]
+            for key in dead:
+                del self.cache[key]
+            return len(dead)
+    
     async def clear(self):
         """Clear entire cache"""
         async with self.lock:
@@ -100,20 +136,42 @@ class CacheManager:
     
     def __init__(self):
         self.memory_cache = MemoryCache(max_size=CACHE_MAX_SIZE, default_ttl=CACHE_TTL)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
         self._initialized = False
     
     async def initialize(self):
         """Initialize cache"""
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
         self._initialized = True
         logger.info("Cache manager initialized")
     
+    async def _sweep_loop(self):
+        """Periodically reap expired entries so they don't push out live ones"""
+        while True:
+            await asyncio.sleep(_SWEEP_INTERVAL)
+            removed = await self.memory_cache.purge_expired()
+            if removed:
+                logger.debug("Swept %s expired cache entries", removed)
+    
+    async def close(self):
+        """Stop the background sweep"""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+    
     async def get(self, key: str) -> Optional[Any]:
         """Get from cache"""
         return await self.memory_cache.get(key)
     
-    async def set(self, key: str, value: Any, ttl: int = None):
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Get from cache, falling back to an expired-but-stale entry"""
+        return await self.memory_cache.get_stale(key)
+    
+    async def set(self, key: str, value: Any, ttl: int = None, stale_ttl: int = 0):
         """Set in cache"""
-        await self.memory_cache.set(key, value, ttl)
+        await self.memory_cache.set(key, value, ttl, stale_ttl)
     
     async def get_or_set(self, key: str, factory, ttl: int = None) -> Any:
         """Get from cache or compute and set"""
@@ -130,6 +188,39 @@ class CacheManager:
             await self.set(key, value, ttl)
         
         return value
+    
+    def in_flight(self, key: str) -> bool:
+        """Check whether a single_flight call for key is running"""
+        return key in self._inflight
+    
+    async def single_flight(self, key: str, factory) -> Any:
+        """Run factory once per key, sharing the result with concurrent callers"""
+        future = self._inflight.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # The leader went away; retry, possibly taking over as leader
+                future = self._inflight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            # Don't cancel the followers along with the leader
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited future doesn't log
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
 
 
 # Global instance
@@ -1,11 +1,10 @@
 # utils/cookie_manager.py
 
 import time
-import hashlib
 import random
-import string
+import secrets
 from typing import Dict, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +18,7 @@ class Cookie:
     success_count: int = 0
     fail_count: int = 0
     is_valid: bool = True
+    parts: Dict[str, str] = field(default_factory=dict)
 
 
 class CookieManager:
@@ -26,81 +26,73 @@ class CookieManager:
     
     def __init__(self):
         self.cookies: List[Cookie] = []
+        self._by_value: Dict[str, Cookie] = {}
         self._generate_initial_cookies()
     
     def _generate_initial_cookies(self, count: int = 10):
         """Generate initial pool of cookies"""
         for _ in range(count):
-            cookie = self._generate_cookie()
-            self.cookies.append(Cookie(
-                value=cookie,
+            parts = self._generate_cookie()
+            cookie = Cookie(
+                value="; ".join([f"{k}={v}" for k, v in parts.items()]),
                 created_at=time.time(),
-                last_used=0
-            ))
+                last_used=0,
+                parts=parts
+            )
+            self.cookies.append(cookie)
+            self._by_value[cookie.value] = cookie
     
-    def _generate_cookie(self) -> str:
+    def _generate_cookie(self) -> Dict[str, str]:
         """Generate a realistic Terabox cookie"""
-        timestamp = int(time.time() * 1000)
-        random_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=32))
-        
-        ndus = f"Y{hashlib.md5(str(timestamp).encode()).hexdigest()[:26]}"
-        browser_id = ''.join(random.choices(string.ascii_letters + string.digits, k=32))
-        csrf_token = hashlib.sha256(str(timestamp).encode()).hexdigest()[:32]
-        
-        cookies = {
-            "ndus": ndus,
-            "browserid": browser_id,
-            "csrfToken": csrf_token,
+        return {
+            "ndus": f"Y{secrets.token_hex(13)}",
+            "browserid": secrets.token_hex(16),
+            "csrfToken": secrets.token_hex(16),
             "lang": "en",
-            "TSID": f"A{random_id}",
+            "TSID": f"A{secrets.token_hex(16).upper()}",
         }
-        
-        return "; ".join([f"{k}={v}" for k, v in cookies.items()])
     
     def get_cookie(self) -> str:
         """Get a working cookie"""
+        return self._select_cookie().value
+    
+    def _select_cookie(self) -> Cookie:
+        """Pick a valid cookie, favouring ones that have worked"""
         valid_cookies = [c for c in self.cookies if c.is_valid]
         
         if not valid_cookies:
             self.cookies = []
+            self._by_value.clear()
             self._generate_initial_cookies()
             valid_cookies = self.cookies
         
-        valid_cookies.sort(
-            key=lambda c: c.success_count / max(1, c.success_count + c.fail_count),
-            reverse=True
-        )
-        
-        selected = random.choice(valid_cookies[:3]) if len(valid_cookies) >= 3 else valid_cookies[0]
+        # Smoothed success ratio so fresh cookies still get picked
+        weights = [
+            (c.success_count + 1) / (c.success_count + c.fail_count + 2)
+            for c in valid_cookies
+        ]
+        selected = random.choices(valid_cookies, weights=weights)[0]
         selected.last_used = time.time()
         
-        return selected.value
+        return selected
     
     def report_success(self, cookie_value: str):
         """Report successful cookie usage"""
-        for cookie in self.cookies:
-            if cookie.value == cookie_value:
-                cookie.success_count += 1
-                break
+        cookie = self._by_value.get(cookie_value)
+        if cookie:
+            cookie.success_count += 1
     
     def report_failure(self, cookie_value: str):
         """Report failed cookie usage"""
-        for cookie in self.cookies:
-            if cookie.value == cookie_value:
-                cookie.fail_count += 1
-                if cookie.fail_count > 3:
-                    cookie.is_valid = False
-                break
+        cookie = self._by_value.get(cookie_value)
+        if cookie:
+            cookie.fail_count += 1
+            if cookie.fail_count > 3:
+                cookie.is_valid = False
     
     def get_cookie_dict(self) -> Dict[str, str]:
         """Get cookie as dictionary"""
-        cookie_str = self.get_cookie()
-        cookies = {}
-        for part in cookie_str.split("; "):
-            if "=" in part:
-                key, value = part.split("=", 1)
-                cookies[key] = value
-        return cookies
+        return dict(self._select_cookie().parts)
 
 
 # Global instance
@@ -0,0 +1,48 @@
+# utils/http_client.py
+
+import aiohttp
+from typing import Optional
+import logging
+
+from config import REQUEST_TIMEOUT, CONNECT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Process-wide HTTP session shared by all extractors"""
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def initialize(self):
+        """Create the shared session"""
+        if self.session is not None and not self.session.closed:
+            return
+
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+        logger.info("HTTP client initialized")
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use"""
+        if self.session is None or self.session.closed:
+            await self.initialize()
+        return self.session
+
+    async def close(self):
+        """Close the shared session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+
+# Global instance
+http_client = HttpClient()
@@ -5,6 +5,7 @@ from .proxy_manager import ProxyManager, proxy_manager
 from .cookie_manager import CookieManager, cookie_manager
 from .cache_manager import CacheManager, cache_manager
 from .rate_limiter import RateLimiter, rate_limiter
+from .http_client import HttpClient, http_client
 
 __all__ = [
     "UserAgentManager",
@@ -16,4 +17,6 @@ __all__ = [
     "cache_manager",
     "RateLimiter",
     "rate_limiter",
+    "HttpClient",
+    "http_client",
 ]
@@ -4,17 +4,29 @@ import asyncio
 import aiohttp
 import random
 import time
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
-from collections import defaultdict
 import logging
 
 from config import USE_PROXY, PROXY_SOURCES, CUSTOM_PROXIES
 
 logger = logging.getLogger(__name__)
 
+_DOMAIN_COOLDOWN = 5
+_MAX_COOLDOWNS = 100_000
+_COOLDOWN_SWEEP_EVERY = 1000
+_TEST_CONCURRENCY = 20
+_TEST_BATCH_SIZE = 100
+_TEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+_STARTUP_TEST_SAMPLE = 50
+_STARTUP_TEST_BUDGET = 10
+_POOL_TEST_BUDGET = 600
+_MIN_POOL_SIZE = 20
+_REFETCH_INTERVAL = 300
+_RECHECK_INTERVAL = 60
 
-@dataclass
+
+@dataclass(slots=True)
 class Proxy:
     url: str
     protocol: str = "http"
@@ -23,14 +35,17 @@ class Proxy:
     fail_count: int = 0
     avg_response_time: float = 0
     is_alive: bool = True
+    score: float = 0.5
     
-    @property
-    def score(self) -> float:
-        if self.success_count + self.fail_count == 0:
-            return 0.5
-        success_rate = self.success_count / (self.success_count + self.fail_count)
-        speed_score = max(0, 1 - (self.avg_response_time / 10))
-        return (success_rate * 0.7) + (speed_score * 0.3)
+    def _recompute_score(self):
+        """Recompute the cached score after the counters change"""
+        total = self.success_count + self.fail_count
+        if total == 0:
+            self.score = 0.5
+            return
+        success_rate = self.success_count / total
+        speed_score = max(0.0, 1 - (self.avg_response_time / 10))
+        self.score = (success_rate * 0.7) + (speed_score * 0.3)
 
 
 class ProxyManager:
@@ -38,8 +53,15 @@ class ProxyManager:
     
     def __init__(self):
         self.proxies: List[Proxy] = []
-        self.lock = asyncio.Lock()
-        self.domain_cooldowns: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._by_url: Dict[str, Proxy] = {}
+        # Immutable view of the alive proxies, rebuilt only when membership changes
+        self._alive: Tuple[Proxy, ...] = ()
+        # (domain, proxy URL) -> last use, in insertion order of the most recent use
+        self.domain_cooldowns: Dict[Tuple[str, str], float] = {}
+        self._cooldown_writes = 0
+        self._check_task: Optional[asyncio.Task] = None
+        self._last_check = float("-inf")
+        self._last_fetch = float("-inf")
         self._initialized = False
     
     async def initialize(self):
@@ -50,118 +72,229 @@ class ProxyManager:
         
         # Add custom proxies
         for proxy_url in CUSTOM_PROXIES:
-            self.proxies.append(Proxy(url=proxy_url))
+            self._add_proxy(proxy_url)
         
         # Fetch free proxies
         await self._fetch_free_proxies()
         
-        # Test proxies
-        await self._test_all_proxies()
+        # Check a bounded sample before polling starts; the rest is checked in the background
+        sample = self.proxies[:_STARTUP_TEST_SAMPLE]
+        self._prune(await self._test_proxies(sample, time.monotonic() + _STARTUP_TEST_BUDGET))
+        self._start_pool_check()
         
         self._initialized = True
-        logger.info(f"Proxy manager initialized with {len(self.proxies)} proxies")
+        logger.info(
+            f"Proxy manager initialized with {len(self._alive)} live proxies, "
+            f"{len(self.proxies) - len(self._alive)} awaiting checks"
+        )
     
     async def _fetch_free_proxies(self):
         """Fetch proxies from free sources"""
+        self._last_fetch = time.monotonic()
         async with aiohttp.ClientSession() as session:
-            for source in PROXY_SOURCES:
-                try:
-                    async with session.get(source, timeout=15) as response:
-                        if response.status == 200:
-                            text = await response.text()
-                            for line in text.strip().split('\n'):
-                                line = line.strip()
-                                if line and ':' in line:
-                                    proxy_url = f"http://{line}"
-                                    if not any(p.url == proxy_url for p in self.proxies):
-                                        self.proxies.append(Proxy(url=proxy_url))
-                except Exception as e:
-                    logger.debug(f"Failed to fetch from {source}: {e}")
-    
-    async def _test_all_proxies(self):
-        """Test all proxies"""
-        if not self.proxies:
-            return
-            
+            results = await asyncio.gather(
+                *[self._fetch_source(session, source) for source in PROXY_SOURCES]
+            )
+        
+        for lines in results:
+            for line in lines:
+                line = line.strip()
+                if line and ':' in line:
+                    self._add_proxy(f"http://{line}")
+    
+    async def _fetch_source(self, session: aiohttp.ClientSession, source: str) -> List[str]:
+        """Fetch the raw proxy lines from one source"""
+        try:
+            async with session.get(source, timeout=15) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    return text.splitlines()
+        except Exception as e:
+            logger.debug("Failed to fetch from %s: %s", source, e)
+        return []
+    
+    def _add_proxy(self, proxy_url: str):
+        """Add a proxy to the pool unless it is already known"""
+        if proxy_url not in self._by_url:
+            # Not handed out until a health check passes
+            proxy = Proxy(url=proxy_url, is_alive=False)
+            self.proxies.append(proxy)
+            self._by_url[proxy_url] = proxy
+    
+    def _start_pool_check(self):
+        """Start a background pool check unless one is already running"""
+        if self._check_task is None or self._check_task.done():
+            self._last_check = time.monotonic()
+            self._check_task = asyncio.create_task(self._check_pool())
+    
+    async def _check_pool(self):
+        """Health-check every proxy not known to be alive, within a time budget"""
+        if len(self.proxies) < _MIN_POOL_SIZE and time.monotonic() - self._last_fetch >= _REFETCH_INTERVAL:
+            # Pruning has left almost nothing to test; top the pool back up first
+            for proxy_url in CUSTOM_PROXIES:
+                self._add_proxy(proxy_url)
+            await self._fetch_free_proxies()
+        
+        pending = [p for p in self.proxies if not p.is_alive]
+        self._prune(await self._test_proxies(pending, time.monotonic() + _POOL_TEST_BUDGET))
+        logger.info(f"Active proxies after pool check: {len(self._alive)}")
+    
+    async def _test_proxies(self, proxies: List[Proxy], deadline: float) -> List[Proxy]:
+        """Test proxies in batches until the deadline, returning the ones checked"""
+        tested: List[Proxy] = []
+        if not proxies:
+            return tested
+        
         test_url = "https://www.google.com"
-        tasks = [self._test_proxy(proxy, test_url) for proxy in self.proxies[:50]]  # Test first 50
-        await asyncio.gather(*tasks, return_exceptions=True)
+        semaphore = asyncio.Semaphore(_TEST_CONCURRENCY)
+        connector = aiohttp.TCPConnector(limit=0, ssl=False)
+        async with aiohttp.ClientSession(connector=connector, timeout=_TEST_TIMEOUT) as session:
+            # Batches keep the number of pending tasks bounded on large pools
+            for i in range(0, len(proxies), _TEST_BATCH_SIZE):
+                if time.monotonic() >= deadline:
+                    break
+                batch = proxies[i:i + _TEST_BATCH_SIZE]
+                results = await asyncio.gather(
+                    *[self._test_proxy(proxy, test_url, session, semaphore, deadline)
+                      for proxy in batch],
+                    return_exceptions=True
+                )
+                tested.extend(p for p, ok in zip(batch, results) if isinstance(ok, bool))
+                # Make proxies that just passed usable straight away
+                self._refresh_alive()
         
-        self.proxies = [p for p in self.proxies if p.is_alive]
-        logger.info(f"Active proxies after testing: {len(self.proxies)}")
+        return tested
     
-    async def _test_proxy(self, proxy: Proxy, test_url: str) -> bool:
-        """Test a single proxy"""
+    def _prune(self, tested: List[Proxy]):
+        """Drop proxies that failed their health check"""
+        dead = {p.url for p in tested if not p.is_alive}
+        if dead:
+            self.proxies = [p for p in self.proxies if p.url not in dead]
+            self._by_url = {p.url: p for p in self.proxies}
+        self._refresh_alive()
+    
+    async def _test_proxy(
+        self,
+        proxy: Proxy,
+        test_url: str,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        deadline: float
+    ) -> Optional[bool]:
+        """Test a single proxy, returning None if the deadline cut it short"""
+        cut_short = False
         try:
-            start_time = time.time()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    test_url,
-                    proxy=proxy.url,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                    ssl=False
-                ) as response:
+            async with semaphore:
+                start_time = time.monotonic()
+                remaining = deadline - start_time
+                if remaining <= 0:
+                    return None
+                # Never run past the deadline; a proxy still pending then stays untested
+                cut_short = remaining < _TEST_TIMEOUT.total
+                timeout = aiohttp.ClientTimeout(total=remaining) if cut_short else _TEST_TIMEOUT
+                async with session.get(test_url, proxy=proxy.url, timeout=timeout) as response:
                     if response.status == 200:
                         proxy.is_alive = True
-                        proxy.avg_response_time = time.time() - start_time
+                        proxy.avg_response_time = time.monotonic() - start_time
                         proxy.success_count += 1
+                        proxy._recompute_score()
                         return True
-        except:
+        except asyncio.TimeoutError:
+            if cut_short:
+                return None
+        except Exception:
             pass
         
         proxy.is_alive = False
         proxy.fail_count += 1
+        proxy._recompute_score()
         return False
     
+    def _refresh_alive(self):
+        """Rebuild the alive-proxy snapshot"""
+        self._alive = tuple(p for p in self.proxies if p.is_alive)
+    
     async def get_proxy(self, domain: str = None) -> Optional[str]:
         """Get best available proxy"""
-        if not USE_PROXY or not self.proxies:
+        if not USE_PROXY:
             return None
-            
-        async with self.lock:
-            alive_proxies = [p for p in self.proxies if p.is_alive]
-            
-            if not alive_proxies:
-                for p in self.proxies:
-                    p.is_alive = True
-                alive_proxies = self.proxies
-            
-            if domain:
-                now = time.time()
-                available = [
-                    p for p in alive_proxies
-                    if now - self.domain_cooldowns[domain].get(p.url, 0) > 5
-                ]
-                if available:
-                    alive_proxies = available
-            
-            alive_proxies.sort(key=lambda p: p.score, reverse=True)
-            top_proxies = alive_proxies[:max(5, len(alive_proxies) // 4)]
-            selected = random.choice(top_proxies)
-            
-            selected.last_used = time.time()
-            if domain:
-                self.domain_cooldowns[domain][selected.url] = time.time()
-            
-            return selected.url
+        
+        # Selection never awaits, so it reads the snapshot without a lock
+        alive_proxies = self._alive
+        
+        if not alive_proxies:
+            # Re-check (and refill) in the background and let this request go direct meanwhile
+            if time.monotonic() - self._last_check >= _RECHECK_INTERVAL:
+                self._start_pool_check()
+            return None
+        
+        now = time.monotonic()
+        candidates = alive_proxies
+        
+        if domain and self.domain_cooldowns:
+            cooldowns = self.domain_cooldowns
+            cutoff = now - _DOMAIN_COOLDOWN
+            available = [p for p in alive_proxies if cooldowns.get((domain, p.url), 0) < cutoff]
+            if available:
+                candidates = available
+        
+        # Squared scores favour reliable proxies; the floor keeps weak ones in rotation
+        weights = [max(p.score, 1e-3) ** 2 for p in candidates]
+        selected = random.choices(candidates, weights=weights)[0]
+        selected.last_used = now
+        if domain:
+            self._record_cooldown(domain, selected.url, now)
+        
+        return selected.url
+    
+    def _record_cooldown(self, domain: str, proxy_url: str, now: float):
+        """Start a proxy's cooldown for a domain, keeping the map bounded"""
+        key = (domain, proxy_url)
+        # Re-insert so the oldest use is always first
+        self.domain_cooldowns.pop(key, None)
+        self.domain_cooldowns[key] = now
+        if len(self.domain_cooldowns) > _MAX_COOLDOWNS:
+            del self.domain_cooldowns[next(iter(self.domain_cooldowns))]
+        
+        self._cooldown_writes += 1
+        if self._cooldown_writes % _COOLDOWN_SWEEP_EVERY == 0:
+            self._sweep_cooldowns(now)
+    
+    def _sweep_cooldowns(self, now: float):
+        """Drop cooldowns that have already lapsed"""
+        cutoff = now - _DOMAIN_COOLDOWN
+        self.domain_cooldowns = {
+            key: used for key, used in self.domain_cooldowns.items() if used >= cutoff
+        }
     
     async def report_success(self, proxy_url: str, response_time: float = None):
         """Report successful proxy usage"""
-        for proxy in self.proxies:
-            if proxy.url == proxy_url:
-                proxy.success_count += 1
-                if response_time:
-                    proxy.avg_response_time = (proxy.avg_response_time + response_time) / 2
-                break
+        proxy = self._by_url.get(proxy_url)
+        if proxy is None:
+            return
+        
+        proxy.success_count += 1
+        if response_time:
+            proxy.avg_response_time = (proxy.avg_response_time + response_time) / 2
+        proxy._recompute_score()
     
     async def report_failure(self, proxy_url: str):
         """Report failed proxy usage"""
-        for proxy in self.proxies:
-            if proxy.url == proxy_url:
-                proxy.fail_count += 1
-                if proxy.fail_count > 5 and proxy.score < 0.3:
-                    proxy.is_alive = False
-                break
+        proxy = self._by_url.get(proxy_url)
+        if proxy is None:
+            return
+        
+        proxy.fail_count += 1
+        proxy._recompute_score()
+        if proxy.is_alive and proxy.fail_count > 5 and proxy.score < 0.3:
+            proxy.is_alive = False
+            self._refresh_alive()
+    
+    async def close(self):
+        """Stop any background pool check"""
+        if self._check_task is not None:
+            self._check_task.cancel()
+            self._check_task = None
     
     def get_stats(self) -> Dict:
         """Get proxy pool statistics"""
@@ -2,29 +2,40 @@
 
 import time
 import asyncio
-from typing import Dict
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 import logging
 
 from config import RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD, USER_RATE_LIMIT
 
 logger = logging.getLogger(__name__)
 
+_MAX_USER_BUCKETS = 100_000
+_USER_BUCKET_IDLE = 600
 
-@dataclass
+
+@dataclass(slots=True)
 class RateLimitBucket:
     tokens: float
     last_update: float
     max_tokens: int
     refill_rate: float
+    _inv_refill: float = field(init=False, repr=False)
     
-    def consume(self, tokens: int = 1) -> bool:
-        """Try to consume tokens"""
-        now = time.time()
+    def __post_init__(self):
+        self._inv_refill = 1.0 / self.refill_rate
+    
+    def refill(self):
+        """Add the tokens accrued since the last update"""
+        now = time.monotonic()
         elapsed = now - self.last_update
         
         self.tokens = min(self.max_tokens, self.tokens + elapsed * self.refill_rate)
         self.last_update = now
+    
+    def consume(self, tokens: int = 1) -> bool:
+        """Try to consume tokens"""
+        self.refill()
         
         if self.tokens >= tokens:
             self.tokens -= tokens
@@ -36,7 +47,7 @@ class RateLimitBucket:
         if self.tokens >= tokens:
             return 0
         needed = tokens - self.tokens
-        return needed / self.refill_rate
+        return needed * self._inv_refill
 
 
 class RateLimiter:
@@ -45,49 +56,81 @@ class RateLimiter:
     def __init__(self):
         self.global_bucket = RateLimitBucket(
             tokens=RATE_LIMIT_REQUESTS,
-            last_update=time.time(),
+            last_update=time.monotonic(),
             max_tokens=RATE_LIMIT_REQUESTS,
             refill_rate=RATE_LIMIT_REQUESTS / RATE_LIMIT_PERIOD
         )
         
-        self.user_buckets: Dict[int, RateLimitBucket] = {}
-        self.lock = asyncio.Lock()
+        self.user_buckets: OrderedDict[int, RateLimitBucket] = OrderedDict()
     
     def _get_user_bucket(self, user_id: int) -> RateLimitBucket:
         """Get or create user bucket"""
-        if user_id not in self.user_buckets:
-            self.user_buckets[user_id] = RateLimitBucket(
-                tokens=USER_RATE_LIMIT,
-                last_update=time.time(),
-                max_tokens=USER_RATE_LIMIT,
-                refill_rate=USER_RATE_LIMIT / 60
-            )
-        return self.user_buckets[user_id]
+        bucket = self.user_buckets.get(user_id)
+        if bucket is not None:
+            self.user_buckets.move_to_end(user_id)
+            return bucket
+        
+        self._evict_idle_buckets()
+        bucket = self.user_buckets[user_id] = RateLimitBucket(
+            tokens=USER_RATE_LIMIT,
+            last_update=time.monotonic(),
+            max_tokens=USER_RATE_LIMIT,
+            refill_rate=USER_RATE_LIMIT / 60
+        )
+        return bucket
     
-    async def acquire(self, user_id: int = None) -> bool:
+    def _evict_idle_buckets(self):
+        """Drop least recently used buckets that have idled back to full"""
+        now = time.monotonic()
+        while self.user_buckets:
+            user_id, bucket = next(iter(self.user_buckets.items()))
+            idle = now - bucket.last_update
+            refilled = bucket.tokens + idle * bucket.refill_rate >= bucket.max_tokens
+            if len(self.user_buckets) < _MAX_USER_BUCKETS and not (idle > _USER_BUCKET_IDLE and refilled):
+                break
+            del self.user_buckets[user_id]
+    
+    def acquire(self, user_id: int = None) -> bool:
         """Try to acquire permission"""
-        async with self.lock:
-            if not self.global_bucket.consume():
+        # No awaits here, so the check-then-take below is atomic on the event loop
+        user_bucket = self._get_user_bucket(user_id) if user_id else None
+        
+        self.global_bucket.refill()
+        if self.global_bucket.tokens < 1:
+            return False
+        
+        if user_bucket:
+            user_bucket.refill()
+            if user_bucket.tokens < 1:
                 return False
-            
-            if user_id:
-                user_bucket = self._get_user_bucket(user_id)
-                if not user_bucket.consume():
-                    self.global_bucket.tokens += 1
-                    return False
-            
+            user_bucket.tokens -= 1
+        
+        self.global_bucket.tokens -= 1
+        return True
+    
+    def acquire_user(self, user_id: int = None) -> bool:
+        """Try to acquire permission from the user's bucket only"""
+        if not user_id:
             return True
+        return self._get_user_bucket(user_id).consume()
     
     async def wait_and_acquire(self, user_id: int = None, timeout: float = 30) -> bool:
         """Wait until rate limit allows"""
-        start = time.time()
+        deadline = time.monotonic() + timeout
         
-        while time.time() - start < timeout:
-            if await self.acquire(user_id):
-                return True
-            await asyncio.sleep(0.5)
+        while not self.acquire(user_id):
+            wait = self.global_bucket.time_until_available()
+            if user_id:
+                user_bucket = self._get_user_bucket(user_id)
+                user_bucket.refill()
+                wait = max(wait, user_bucket.time_until_available())
+            
+            # Tokens only ever arrive at the refill rate, so a longer wait can't succeed
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
         
-        return False
+        return True
     
     def get_user_remaining(self, user_id: int) -> int:
         """Get remaining requests for user"""
@@ -1,6 +1,7 @@
 # utils/user_agents.py
 
 import random
+import functools
 from typing import List, Dict
 
 
@@ -50,6 +51,12 @@ class UserAgentManager:
         else:
             ua = cls.get_random_desktop()
         
+        return cls._headers_for(ua).copy()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _headers_for(ua: str) -> Dict[str, str]:
+        """Build header template for a user agent (copy before mutating)"""
         return {
             "User-Agent": ua,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",